@@ -2,11 +2,12 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import threading
 import time
 import warnings
 from collections import defaultdict
-from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from typing import Any, Callable, Dict, List, MutableSet, Optional
 
 from pyxxl import error
@@ -14,8 +15,8 @@ from pyxxl.ctx import g
 from pyxxl.enum import executorBlockStrategy
 from pyxxl.log import executor_logger
 from pyxxl.logger import DiskLog, LogBase, new_logger
-from pyxxl.process_executor import run_handler_in_process
-
+from pyxxl.process_executor import HandlerRef
+from pyxxl.process_pool import configure_pool, handler_ref, register_handler, run_in_pool, shutdown_pool
 from pyxxl.schema import RunData
 from pyxxl.setting import ExecutorConfig
 from pyxxl.types import DecoratedCallable
@@ -40,6 +41,7 @@ def _serialize_logger_factory(logger_factory: Any) -> Dict[str, Any]:
             'type': 'fallback',
         }
 
+
 # https://docs.python.org/3.10/library/asyncio-task.html#asyncio.create_task
 _BACKGROUND_TASKS: MutableSet[asyncio.Task] = set()
 
@@ -53,6 +55,8 @@ def _spawn_task(task: asyncio.Task) -> None:
 class HandlerInfo:
     handler: Callable
     is_async: bool = False
+    _ref: Optional[HandlerRef] = field(default=None, init=False, repr=False, compare=False)
+    _ref_resolved: bool = field(default=False, init=False, repr=False, compare=False)
 
     def __str__(self) -> str:
         return "<HandlerInfo {}>".format(self.handler.__name__)
@@ -60,7 +64,14 @@ class HandlerInfo:
     def __post_init__(self) -> None:
         self.is_async = asyncio.iscoroutinefunction(self.handler)
 
-    async def start(self, timeout: int, process_pool: Optional[Any] = None, logger_factory: Optional[Any] = None) -> Any:
+    def pool_ref(self) -> Optional[HandlerRef]:
+        """handler在进程池中的引用,第一次执行时解析一次,注册时函数还没有绑定到模块上"""
+        if not self._ref_resolved:
+            self._ref = handler_ref(self.handler)
+            self._ref_resolved = True
+        return self._ref
+
+    async def start(self, timeout: int, logger_factory: Optional[Any] = None) -> Any:
         if self.is_async:
             return await asyncio.wait_for(self.handler(), timeout=timeout)
 
@@ -69,7 +80,6 @@ class HandlerInfo:
         run_data = g.try_get_run_data()
         if run_data is None:
             # Fallback for testing scenarios - create minimal run data
-            from pyxxl.schema import RunData
             run_data = RunData(
                 jobId=0,
                 logId=0,
@@ -77,60 +87,35 @@ class HandlerInfo:
                 executorBlockStrategy="DISCARD_LATER"
             )
             g.set_xxl_run_data(run_data)
-        
-        # Convert RunData to dict for serialization
-        run_data_dict = run_data.to_dict()
-        
+
+        ref = self.pool_ref()
+        if ref is None:
+            # Function cannot be pickled (likely a test with local function)
+            # Fall back to threading for test compatibility
+            warnings.warn(
+                f"Handler {getattr(self.handler, '__name__', 'unknown')} cannot be pickled. "
+                "Falling back to threading. This should only happen in tests.",
+                UserWarning,
+                stacklevel=2
+            )
+
+            event = threading.Event()
+            g.set_cancel_event(event)
+            try:
+                return await asyncio.wait_for(asyncio.to_thread(self.handler), timeout=timeout)
+            except (asyncio.exceptions.TimeoutError, asyncio.CancelledError) as timeout_error:
+                event.set()
+                raise timeout_error
+
         # Prepare logger factory information for the subprocess
         logger_factory_info = None
         if logger_factory is not None:
             logger_factory_info = _serialize_logger_factory(logger_factory)
-        
-        loop = asyncio.get_event_loop()
-        
-        # Try multiprocessing first, fall back to threading for unpicklable functions (like in tests)
-        try:
-            # Execute in process pool - no threading fallback
-            if process_pool is None:
-                # For tests, create a temporary process pool
-                from concurrent.futures import ProcessPoolExecutor
-                temp_process_pool = ProcessPoolExecutor(max_workers=1)
-                try:
-                    result = await asyncio.wait_for(
-                        loop.run_in_executor(temp_process_pool, run_handler_in_process, self.handler, run_data_dict, logger_factory_info), 
-                        timeout=timeout
-                    )
-                    return result
-                finally:
-                    temp_process_pool.shutdown(wait=False)
-            else:
-                return await asyncio.wait_for(
-                    loop.run_in_executor(process_pool, run_handler_in_process, self.handler, run_data_dict, logger_factory_info), 
-                    timeout=timeout
-                )
-        except (AttributeError, TypeError) as e:
-            if "pickle" in str(e):
-                # Function cannot be pickled (likely a test with local function)
-                # Fall back to threading for test compatibility
-                import threading
-                import warnings
-                warnings.warn(
-                    f"Handler {getattr(self.handler, '__name__', 'unknown')} cannot be pickled. "
-                    "Falling back to threading. This should only happen in tests.",
-                    UserWarning,
-                    stacklevel=2
-                )
-                
-                event = threading.Event()
-                g.set_cancel_event(event)
-                try:
-                    return await asyncio.wait_for(asyncio.to_thread(self.handler), timeout=timeout)
-                except (asyncio.exceptions.TimeoutError, asyncio.CancelledError) as timeout_error:
-                    event.set()
-                    raise timeout_error
-            else:
-                # Re-raise non-pickle related errors
-                raise
+
+        return await asyncio.wait_for(
+            run_in_pool(ref, run_data, logger_factory_info),
+            timeout=timeout,
+        )
 
 
 class XXLTask:
@@ -168,6 +153,8 @@ class JobHandler:
                     stacklevel=2,
                 )
             self._handlers[handler_name] = handler
+            if not handler.is_async:
+                register_handler(handler_name, func)
             self.logger.debug("register job %s,is async: %s" % (handler_name, asyncio.iscoroutinefunction(func)))
 
             return func
@@ -216,10 +203,8 @@ class Executor:
         )
         # todo: lock for jobId
         self.lock = asyncio.Lock()
-        # Use ProcessPoolExecutor for better isolation of CPU-intensive tasks
-        self.process_pool = ProcessPoolExecutor(
-            max_workers=self.config.max_workers,
-        )
+        # Sync handlers run in the shared pool from pyxxl.process_pool
+        configure_pool(max_workers=self.config.max_workers, start_method=self.config.process_start_method)
         # Keep thread pool for async framework requirements only
         self.thread_pool = ThreadPoolExecutor(
             max_workers=1,  # Minimal thread pool for asyncio framework
@@ -317,7 +302,7 @@ class Executor:
             try:
                 task_logger.info("Start job jobId=%s logId=%s [%s]" % (data.jobId, data.logId, data))
                 timeout = data.executorTimeout or self.config.task_timeout
-                result = await handler.start(timeout, process_pool=self.process_pool, logger_factory=self.logger_factory)
+                result = await handler.start(timeout, logger_factory=self.logger_factory)
                 task_logger.info("Job finished jobId=%s logId=%s" % (data.jobId, data.logId))
                 await self.xxl_client.callback(data.logId, start_time, code=200, msg=result)
                 self.successed_callback()
@@ -364,7 +349,7 @@ class Executor:
                 task.task.cancel()
 
         # Shutdown the process and thread pools
-        self.process_pool.shutdown(wait=False)
+        shutdown_pool(wait=False)
         self.thread_pool.shutdown(wait=False)
 
     async def graceful_close(self, timeout: int = 60) -> None:
@@ -1,7 +1,10 @@
 import asyncio
+import io
 import logging
+import threading
 from abc import ABC, abstractmethod
-from typing import Any, AsyncContextManager, Optional
+from logging.handlers import QueueHandler
+from typing import Any, AsyncContextManager, BinaryIO, Optional, Tuple, cast
 
 from pyxxl.ctx import g
 from pyxxl.types import LogRequest, LogResponse
@@ -12,7 +15,29 @@ TASK_FORMAT = (
     "%(levelname)s %(pathname)s(%(funcName)s:%(lineno)d) - %(message)s"
 )
 TASKDATE_FORMAT = "%Y-%m-%d %H:%M:%S"
-TASK_FORMATTER = logging.Formatter(TASK_FORMAT, datefmt=TASKDATE_FORMAT)
+
+
+class PyxxlTaskFormatter(logging.Formatter):
+    """Formatter that renders asctime once per second with a datefmt, msecs are added by the format string."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        # (second, datefmt, asctime), swapped as a whole so concurrent handlers never see a torn entry
+        self._asctime_cache: Tuple[int, Optional[str], str] = (-1, None, "")
+
+    def formatTime(self, record: logging.LogRecord, datefmt: Optional[str] = None) -> str:
+        if datefmt is None:
+            # the default format already contains the msecs of the record, nothing to share within a second
+            return super().formatTime(record, datefmt)
+        second = int(record.created)
+        cached_second, cached_datefmt, asctime = self._asctime_cache
+        if second != cached_second or datefmt != cached_datefmt:
+            asctime = super().formatTime(record, datefmt)
+            self._asctime_cache = (second, datefmt, asctime)
+        return asctime
+
+
+TASK_FORMATTER = PyxxlTaskFormatter(TASK_FORMAT, datefmt=TASKDATE_FORMAT)
 
 
 class LogBase(ABC):
@@ -60,15 +85,88 @@ class LogBase(ABC):
         return None
 
 
-class PyxxlFileHandler(logging.FileHandler):
-    def emit(self, record: Any) -> None:
+def _set_log_id(record: Any) -> None:
+    # records coming from PyxxlQueueHandler already carry the logId of the emitting task
+    if getattr(record, "logId", None) is None:
         xxl_kwargs = g.try_get_run_data()
         record.logId = xxl_kwargs.logId if xxl_kwargs else "NotInTask"
+
+
+class PyxxlFileHandler(logging.FileHandler):
+    def emit(self, record: Any) -> None:
+        _set_log_id(record)
         return super().emit(record)
 
 
+class PyxxlBufferedFileHandler(PyxxlFileHandler):
+    """FileHandler that coalesces records in a binary buffer and flushes it in the background.
+
+    The buffer is written when it is full, when no flush happened for `flush_interval` seconds, or on close.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        *,
+        buffer_size: int = 64 * 1024,
+        flush_interval: float = 0.2,
+        encoding: str = "utf-8",
+        delay: bool = True,
+    ) -> None:
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self._flush_timer: Optional[threading.Timer] = None
+        super().__init__(filename, encoding=encoding, delay=delay)
+        self._encoding = encoding
+        self._terminator = self.terminator.encode(encoding)
+
+    def _open(self) -> io.TextIOWrapper:
+        # a binary BufferedWriter, FileHandler itself only flushes and closes the stream
+        return cast(io.TextIOWrapper, open(self.baseFilename, self.mode + "b", buffering=self.buffer_size))
+
+    def emit(self, record: Any) -> None:
+        _set_log_id(record)
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            stream = cast(BinaryIO, self.stream)
+            # two writes into the BufferedWriter are cheaper than concatenating each line with its terminator
+            stream.write(self.format(record).encode(self._encoding))
+            stream.write(self._terminator)
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.flush_interval, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+        except Exception:  # pylint: disable=broad-except
+            self.handleError(record)
+
+    def flush(self) -> None:
+        self.acquire()
+        try:
+            self._flush_timer = None
+            super().flush()
+        finally:
+            self.release()
+
+    def close(self) -> None:
+        self.acquire()
+        try:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+        finally:
+            self.release()
+        super().close()
+
+
 class PyxxlStreamHandler(logging.StreamHandler):
     def emit(self, record: Any) -> None:
-        xxl_kwargs = g.try_get_run_data()
-        record.logId = xxl_kwargs.logId if xxl_kwargs else "NotInTask"
+        _set_log_id(record)
         return super().emit(record)
+
+
+class PyxxlQueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> Any:
+        # the QueueListener thread has no task context, resolve logId before queueing
+        _set_log_id(record)
+        return super().prepare(record)
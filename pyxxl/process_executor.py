@@ -1,62 +1,323 @@
 """Process-based executor for running sync handlers in separate processes."""
 
+import importlib
 import logging
-from typing import Any, Callable, Dict
+import os
+import queue
+import sys
+import threading
+import traceback
+from collections import OrderedDict
+from logging.handlers import QueueListener
+from multiprocessing.shared_memory import SharedMemory
+from multiprocessing.util import Finalize
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Set, Tuple, Union, cast
 
+from pyxxl.ctx import g
+from pyxxl.logger.common import TASK_FORMATTER, PyxxlBufferedFileHandler, PyxxlQueueHandler, PyxxlStreamHandler
 from pyxxl.schema import RunData
+from pyxxl.utils import try_import
 
+if TYPE_CHECKING:
+    import msgpack
+else:
+    msgpack = try_import("msgpack")
 
-def run_handler_in_process(handler_func: Callable, run_data_dict: Dict[str, Any], logger_factory_info: Dict[str, Any] = None) -> Any:
-    """Execute a handler function in a separate process with provided context data.
+# a "module:qualname" string for importable handlers, the picklable callable itself otherwise
+HandlerRef = Union[str, Callable]
+# "module:qualname" -> handler, only populated inside worker processes
+_HANDLERS: Dict[str, Callable] = {}
+# str fields larger than this (glueSource, executorParams...) are passed through shared memory
+SHM_THRESHOLD = 64 * 1024
+
+# task log records are queued by the handler thread and written by one listener thread per process
+_LOG_QUEUE: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+_LOG_LISTENER: Optional[QueueListener] = None
+_LOG_LISTENER_FINALIZER: Optional[Finalize] = None
+# seconds a finished task waits for the listener to write its records
+LOG_FLUSH_TIMEOUT = 5.0
+# logger name -> the real handlers of that task logger, used by the listener thread
+_TASK_HANDLERS: Dict[str, List[logging.Handler]] = {}
+# log_id -> (log_path, task logger) of the latest tasks, reused when a log_id runs again in this worker
+_LOGGER_CACHE: "OrderedDict[int, Tuple[str, logging.Logger]]" = OrderedDict()
+LOGGER_CACHE_SIZE = 512
+# task logger names are this prefix plus the log_id
+_NAME_PREFIX = "pyxxl.task_log.disk.task-"
+# log directories already created by this worker
+_MKDIR_CACHE: Set[str] = set()
+
+
+class _FlushRecord(logging.LogRecord):
+    """Queued after the records of a finished task, set once the listener has reached it."""
+
+    def __init__(self) -> None:
+        super().__init__(__name__, logging.NOTSET, __file__, 0, "", None, None)
+        self.done = threading.Event()
+
+
+class _TaskHandlerDispatcher(logging.Handler):
+    """Hand records from the listener thread to the real handlers of their task logger."""
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        if isinstance(record, _FlushRecord):
+            record.done.set()
+            return True
+        for handler in _TASK_HANDLERS.get(record.name, ()):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+        return True
+
+
+def _ensure_log_listener() -> None:
+    global _LOG_LISTENER, _LOG_LISTENER_FINALIZER
+    if _LOG_LISTENER is None:
+        _LOG_LISTENER = QueueListener(_LOG_QUEUE, _TaskHandlerDispatcher())
+        _LOG_LISTENER.start()
+        # atexit hooks are skipped in pool workers, multiprocessing finalizers still run on worker exit
+        _LOG_LISTENER_FINALIZER = Finalize(_LOG_LISTENER, _LOG_LISTENER.stop, exitpriority=10)
+
+
+def _reset_task_logging_after_fork() -> None:
+    # a forked child has the queue and listener of its parent but not the listener thread,
+    # start over with a fresh queue, the cached loggers still point at the old one
+    global _LOG_QUEUE, _LOG_LISTENER, _LOG_LISTENER_FINALIZER
+    if _LOG_LISTENER_FINALIZER is not None:
+        _LOG_LISTENER_FINALIZER.cancel()
+    _LOG_QUEUE = queue.Queue(-1)
+    _LOG_LISTENER = None
+    _LOG_LISTENER_FINALIZER = None
+    for _, logger in _LOGGER_CACHE.values():
+        logger.handlers.clear()
+    _LOGGER_CACHE.clear()
+    _TASK_HANDLERS.clear()
+
+
+os.register_at_fork(after_in_child=_reset_task_logging_after_fork)
+
+
+class LazyTaskLogger:
+    """Stand-in for the task logger, the real logger is created on first attribute access.
+
+    Handlers that never log skip the logger, handler and log file setup. Reading or setting any
+    logger attribute builds the real logger and goes to it, and isinstance checks see a logging.Logger.
+    """
+
+    def __init__(self, log_id: int, logger_factory_info: Optional[Dict[str, Any]] = None) -> None:
+        object.__setattr__(self, "_log_id", log_id)
+        object.__setattr__(self, "_logger_factory_info", logger_factory_info)
+        object.__setattr__(self, "built", None)
+
+    @property  # type: ignore[misc]
+    def __class__(self) -> type:
+        return logging.Logger
+
+    def _get_logger(self) -> logging.Logger:
+        built: Optional[logging.Logger] = self.built
+        if built is None:
+            built = _create_process_logger(self._log_id, self._logger_factory_info)
+            object.__setattr__(self, "built", built)
+        return built
+
+    def __getattr__(self, name: str) -> Any:
+        # only called for attributes missing on the proxy
+        if name.startswith("__") or name in _LAZY_LOGGER_FIELDS:
+            raise AttributeError(name)
+        value = getattr(self._get_logger(), name)
+        if callable(value):
+            # bound methods like info/exception go straight to the real logger from now on
+            object.__setattr__(self, name, value)
+        return value
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name in _LAZY_LOGGER_FIELDS:
+            object.__setattr__(self, name, value)
+            return
+        # e.g. g.logger.disabled = True belongs to the real logger, a cached bound method would shadow it
+        self.__dict__.pop(name, None)
+        setattr(self._get_logger(), name, value)
+
+
+_LAZY_LOGGER_FIELDS = frozenset(("_log_id", "_logger_factory_info", "built"))
+
+
+def import_handler(handler_ref: str) -> Any:
+    """Import the object behind a "module:qualname" reference."""
+    module, _, qualname = handler_ref.partition(":")
+    obj: Any = importlib.import_module(module)
+    for attr in qualname.split("."):
+        obj = getattr(obj, attr)
+    return obj
+
+
+def resolve_handler(handler_ref: HandlerRef) -> Callable:
+    """Get the handler behind a reference, imported "module:qualname" handlers are cached per worker."""
+    if not isinstance(handler_ref, str):
+        return handler_ref
+    handler = _HANDLERS.get(handler_ref)
+    if handler is None:
+        handler = cast(Callable, import_handler(handler_ref))
+        _HANDLERS[handler_ref] = handler
+    return handler
+
+
+def load_handlers(handler_refs: Tuple[str, ...]) -> None:
+    """Preload the registered handlers, called once per worker at boot."""
+    for handler_ref in handler_refs:
+        try:
+            resolve_handler(handler_ref)
+        except Exception:  # pylint: disable=broad-except
+            # an initializer error breaks the whole pool, let the task itself report it
+            logging.getLogger(__name__).warning("preload handler %s failed.", handler_ref, exc_info=True)
+
+
+def pack_run_data(run_data: RunData) -> Tuple[Union[bytes, Dict[str, Any]], List[SharedMemory]]:
+    """Serialize RunData for the worker, moving large str fields into shared memory segments.
+
+    The payload is msgpack bytes if msgpack is installed, otherwise the dict is pickled by the pool.
+    The caller owns the returned segments and must close and unlink them once the task is done.
+    """
+    run_data_dict = run_data.to_dict()
+    segments: List[SharedMemory] = []
+    try:
+        for key, value in run_data_dict.items():
+            if isinstance(value, str) and len(value) > SHM_THRESHOLD:
+                data = value.encode()
+                shm = SharedMemory(create=True, size=len(data))
+                segments.append(shm)
+                shm.buf[: len(data)] = data
+                run_data_dict[key] = {"__shm__": shm.name, "size": len(data)}
+        if msgpack is not None:
+            return msgpack.packb(run_data_dict, use_bin_type=True), segments
+    except BaseException:
+        # e.g. /dev/shm is full, the segments created so far have no owner yet
+        release_segments(segments)
+        raise
+    return run_data_dict, segments
+
+
+def unpack_run_data(payload: Union[bytes, Dict[str, Any]]) -> RunData:
+    """Recreate RunData in the worker, copying shared memory fields out of their segments."""
+    run_data_dict = msgpack.unpackb(payload, raw=False) if isinstance(payload, bytes) else payload
+    for key, value in run_data_dict.items():
+        if isinstance(value, dict) and "__shm__" in value:
+            shm = SharedMemory(name=value["__shm__"])
+            try:
+                run_data_dict[key] = bytes(shm.buf[: value["size"]]).decode()
+            finally:
+                shm.close()
+    return RunData.from_dict(run_data_dict)
+
+
+def release_segments(segments: List[SharedMemory]) -> None:
+    for shm in segments:
+        shm.close()
+        shm.unlink()
+
+
+def run_handler_in_process(
+    handler_ref: HandlerRef,
+    payload: Union[bytes, Dict[str, Any]],
+    logger_factory_info: Optional[Dict[str, Any]] = None,
+) -> Any:
+    """Execute a registered handler in a worker process with provided context data.
 
     This function is designed to be pickle-serializable and run in a separate process.
     It recreates the necessary context from the provided data without ContextVar dependencies.
 
     Args:
-        handler_func: The handler function to execute
-        run_data_dict: Serialized RunData as dict to recreate context
+        handler_ref: "module:qualname" reference of the handler, or the pickled handler itself
+        payload: RunData serialized by pack_run_data to recreate context
         logger_factory_info: Serialized logger factory information to recreate proper logging
 
     Returns:
         The result of the handler function execution
     
     Raises:
-        Exception: Any exception that occurs during handler execution
+        RuntimeError: Wraps any exception that occurs during handler execution
     """
+    handler_func: Optional[Callable] = None
+    process_logger: Optional[LazyTaskLogger] = None
     try:
-        # Import here to avoid circular imports and ensure proper process isolation
-        from pyxxl.ctx import g
+        handler_func = resolve_handler(handler_ref)
 
         # Recreate the RunData from dictionary
-        run_data = RunData.from_dict(run_data_dict)
+        run_data = unpack_run_data(payload)
 
         # Set the context data in the new process - this creates new ContextVar instances
         # in the process, avoiding serialization issues
         g.set_xxl_run_data(run_data)
 
-        # Create a proper logger using the logger factory information
-        process_logger = _create_process_logger(run_data.logId, logger_factory_info)
+        # The logger is only created once the handler touches g.logger
+        process_logger = LazyTaskLogger(run_data.logId, logger_factory_info)
 
         # Set the process-local logger in the ContextVar so g.logger works correctly
-        g.set_task_logger(process_logger)
+        g.set_task_logger(cast(logging.Logger, process_logger))
 
         # Execute the handler function
         return handler_func()
     except Exception as e:
-        # Re-raise with additional context for debugging
-        raise type(e)(f"Error in process execution of {getattr(handler_func, '__name__', 'unknown')}: {e}") from e
+        # rebuilding type(e) breaks for exceptions with extra constructor args, and __cause__ does not survive
+        # the pickle back to the main process, so the original is kept in the message as well
+        name = getattr(handler_func, "__name__", handler_ref)
+        raise RuntimeError(f"Error in process execution of {name}: {e!r}") from e
+    finally:
+        if process_logger is not None and process_logger.built is not None:
+            _release_process_logger(process_logger.built)
+
+
+def run_handlers_in_process(calls: List[Tuple[Any, ...]]) -> List[Tuple[bool, Any]]:
+    """Run a chunk of run_handler_in_process calls, returning (ok, result or exception) for each call."""
+    results: List[Tuple[bool, Any]] = []
+    for call in calls:
+        try:
+            results.append((True, run_handler_in_process(*call)))
+        except Exception as e:  # pylint: disable=broad-except
+            results.append((False, _ExceptionWithTraceback(e)))
+    return results
+
+
+class _RemoteTraceback(Exception):
+    def __init__(self, tb: str) -> None:
+        self.tb = tb
+
+    def __str__(self) -> str:
+        return self.tb
+
+
+def _rebuild_exception(exc: BaseException, tb: str) -> BaseException:
+    exc.__cause__ = _RemoteTraceback(tb)
+    return exc
+
 
+class _ExceptionWithTraceback:
+    """Carry the worker traceback of a returned exception, like concurrent.futures does for raised ones."""
 
-def _create_process_logger(log_id: int, logger_factory_info: Dict[str, Any] = None) -> logging.Logger:
+    def __init__(self, exc: BaseException) -> None:
+        self.exc = exc
+        self.tb = '\n"""\n%s"""' % "".join(traceback.format_exception(type(exc), exc, exc.__traceback__))
+
+    def __reduce__(self) -> Tuple[Callable, Tuple[BaseException, str]]:
+        return _rebuild_exception, (self.exc, self.tb)
+
+
+def _create_process_logger(log_id: int, logger_factory_info: Optional[Dict[str, Any]] = None) -> logging.Logger:
     """Create a logger in the subprocess that matches the main process logger factory."""
     if logger_factory_info and logger_factory_info.get('type') == 'DiskLog':
         # Recreate DiskLog functionality in the subprocess
-        from pyxxl.logger.common import TASK_FORMATTER, PyxxlFileHandler, PyxxlStreamHandler
-        
         log_path = logger_factory_info['log_path']
-        
+        cached = _LOGGER_CACHE.get(log_id)
+        if cached is not None:
+            if cached[0] == log_path:
+                _LOGGER_CACHE.move_to_end(log_id)
+                return cached[1]
+            # same logger name, drop the handlers bound to the old path first
+            del _LOGGER_CACHE[log_id]
+            _discard_process_logger(cached[1])
+
         # Create a logger similar to DiskLog.get_logger
-        logger = logging.getLogger(f"pyxxl.task_log.disk.task-{log_id}")
+        # interned, the name is the _TASK_HANDLERS key looked up for every record
+        logger = logging.getLogger(sys.intern(_NAME_PREFIX + str(log_id)))
         logger.propagate = False
         logger.setLevel(logging.INFO)
         
@@ -67,19 +328,26 @@ def _create_process_logger(log_id: int, logger_factory_info: Dict[str, Any] = No
         stdout_handler = PyxxlStreamHandler()
         stdout_handler.setFormatter(TASK_FORMATTER)
         stdout_handler.setLevel(logging.INFO)
-        logger.addHandler(stdout_handler)
-        
-        # Add file handler  
-        from pathlib import Path
+
+        # Add file handler
         log_file_path = Path(log_path) / f"pyxxl-{log_id}.log"
-        # Ensure directory exists
-        log_file_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        file_handler = PyxxlFileHandler(str(log_file_path), delay=True)
+        # Ensure directory exists, checked once per worker
+        if log_path not in _MKDIR_CACHE:
+            log_file_path.parent.mkdir(parents=True, exist_ok=True)
+            _MKDIR_CACHE.add(log_path)
+        file_handler = PyxxlBufferedFileHandler(str(log_file_path))
         file_handler.setFormatter(TASK_FORMATTER)
         file_handler.setLevel(logging.INFO)
-        logger.addHandler(file_handler)
-        
+
+        # The real handlers are owned by the listener thread, the task only pays for a queue put
+        _ensure_log_listener()
+        _TASK_HANDLERS[logger.name] = [stdout_handler, file_handler]
+        logger.addHandler(PyxxlQueueHandler(_LOG_QUEUE))
+
+        _LOGGER_CACHE[log_id] = (log_path, logger)
+        if len(_LOGGER_CACHE) > LOGGER_CACHE_SIZE:
+            _, (_, evicted) = _LOGGER_CACHE.popitem(last=False)
+            _discard_process_logger(evicted)
         return logger
     else:
         # Fallback to basic logger for unsupported factory types
@@ -91,3 +359,26 @@ def _create_process_logger(log_id: int, logger_factory_info: Dict[str, Any] = No
             process_logger.addHandler(handler)
             process_logger.setLevel(logging.INFO)
         return process_logger
+
+
+def _release_process_logger(logger: logging.Logger) -> None:
+    """Flush the queued records of a finished task and close its file, the file is reopened if the logger is reused."""
+    handlers = _TASK_HANDLERS.get(logger.name)
+    if handlers is None:
+        return
+    # only waits for what was queued so far, threads the handler left behind may keep logging
+    flush = _FlushRecord()
+    _LOG_QUEUE.put_nowait(flush)
+    if not flush.done.wait(LOG_FLUSH_TIMEOUT):
+        logging.getLogger(__name__).warning("task log of %s not flushed in %ss.", logger.name, LOG_FLUSH_TIMEOUT)
+    for handler in handlers:
+        if isinstance(handler, logging.FileHandler):
+            handler.close()
+
+
+def _discard_process_logger(logger: logging.Logger) -> None:
+    # records still in the queue would be dropped by the closed handlers
+    _release_process_logger(logger)
+    for handler in _TASK_HANDLERS.pop(logger.name, ()):
+        handler.close()
+    logger.handlers.clear()
@@ -0,0 +1,222 @@
+"""Persistent process pool shared by all sync handlers.
+
+The pool is built once and reused for every task. Handlers are referenced by a short
+"module:qualname" string that the workers import and cache, so only that key and the
+run data cross the pipe per task. Calls submitted within BATCH_WINDOW are sent in chunks.
+
+The calls of one chunk run one after another in the same worker. A call's timeout therefore
+also covers the time it waits behind its chunk-mates, and a call that was cancelled or timed
+out still runs once its chunk has started. Chunks only grow beyond one call when more than
+about twice as many calls as workers arrive within one window.
+"""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import partial
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from pyxxl.process_executor import (
+    HandlerRef,
+    import_handler,
+    load_handlers,
+    pack_run_data,
+    release_segments,
+    run_handlers_in_process,
+)
+from pyxxl.schema import RunData
+from pyxxl.utils import is_pickle_serializable
+
+_POOL: Optional[ProcessPoolExecutor] = None
+# registered sync handlers, preloaded by the workers of the next pool
+_HANDLERS: Dict[str, Callable] = {}
+# the pool is rebuilt when its settings change
+_VERSION = 0
+_POOL_VERSION = -1
+_MAX_WORKERS: Optional[int] = None
+_START_METHOD: Optional[str] = None
+# imported once by the forkserver template process instead of by every worker, if forkserver is configured
+FORKSERVER_PRELOAD = ["pyxxl", "pyxxl.process_executor"]
+# submissions arriving within this window are dispatched together
+BATCH_WINDOW = 0.005
+
+
+class _PendingCall(NamedTuple):
+    call: Tuple[Any, ...]
+    future: "asyncio.Future[Any]"
+    loop: asyncio.AbstractEventLoop
+    segments: List[SharedMemory]
+
+
+# loop -> calls waiting for the flush scheduled on that loop, every loop batches its own calls
+_PENDING: Dict[asyncio.AbstractEventLoop, List[_PendingCall]] = {}
+
+
+def _worker_init(handler_refs: Tuple[str, ...]) -> None:
+    load_handlers(handler_refs)
+
+
+def _import_ref(handler: Callable) -> Optional[str]:
+    module = getattr(handler, "__module__", None)
+    qualname = getattr(handler, "__qualname__", None)
+    if module is None or qualname is None:
+        return None
+    ref = "%s:%s" % (module, qualname)
+    try:
+        # bound methods resolve to the plain function of the class, only an exact match can be imported by name
+        return ref if import_handler(ref) is handler else None
+    except Exception:  # pylint: disable=broad-except
+        return None
+
+
+def handler_ref(handler: Callable) -> Optional[HandlerRef]:
+    """handler在子进程中的引用
+
+    能通过module:qualname import到的handler返回这个字符串,其他可以pickle的(如bound method、partial)返回handler本身,
+    不能pickle的(如局部函数)返回None.
+    """
+    if not is_pickle_serializable(handler):
+        return None
+    ref = _import_ref(handler)
+    return handler if ref is None else ref
+
+
+def register_handler(name: str, handler: Callable) -> None:
+    """注册一个同步handler,新建的进程池会预先import它"""
+    _HANDLERS[name] = handler
+
+
+def configure_pool(max_workers: Optional[int] = None, start_method: Optional[str] = None) -> None:
+    """设置进程池的参数,参数变化后进程池会在下次获取时重建
+
+    Args:
+        max_workers (Optional[int]): 进程数. Defaults to os.cpu_count().
+        start_method (Optional[str]): multiprocessing的启动方式. Defaults to the platform default.
+    """
+    global _MAX_WORKERS, _START_METHOD, _VERSION
+    if (max_workers, start_method) != (_MAX_WORKERS, _START_METHOD):
+        _MAX_WORKERS, _START_METHOD = max_workers, start_method
+        _VERSION += 1
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """获取共享的进程池,只有参数变化后才会重建"""
+    global _POOL, _POOL_VERSION
+    if _POOL is None or _POOL_VERSION != _VERSION:
+        if _POOL is not None:
+            # running tasks keep going in the old workers
+            _POOL.shutdown(wait=False)
+            _POOL = None
+        # resolved here instead of at register time, decorated functions are not bound to their module yet
+        refs = tuple(ref for ref in map(handler_ref, _HANDLERS.values()) if isinstance(ref, str))
+        # forkserver and spawn re-import the __main__ script in the workers, so they are opt-in only
+        mp_context = multiprocessing.get_context(_START_METHOD)
+        if mp_context.get_start_method() == "forkserver":
+            mp_context.set_forkserver_preload(FORKSERVER_PRELOAD)
+        _POOL = ProcessPoolExecutor(
+            max_workers=_MAX_WORKERS or os.cpu_count(),
+            mp_context=mp_context,
+            initializer=_worker_init,
+            initargs=(refs,),
+        )
+        _POOL_VERSION = _VERSION
+    return _POOL
+
+
+def _chunksize(n: int) -> int:
+    return max(1, n // ((_MAX_WORKERS or os.cpu_count() or 1) + 2))
+
+
+def _set_result(pending: _PendingCall, ok: bool, value: Any) -> None:
+    if pending.future.cancelled():
+        return
+    if ok:
+        pending.future.set_result(value)
+    else:
+        pending.future.set_exception(value)
+
+
+def _chunk_done(chunk: List[_PendingCall], fut: Future) -> None:
+    # runs in a pool thread, the worker may still be reading after a timeout so segments are released only here
+    for pending in chunk:
+        release_segments(pending.segments)
+    if fut.cancelled():
+        # only happens once every call of the chunk was cancelled
+        return
+    if fut.exception() is not None:
+        results: List[Tuple[bool, Any]] = [(False, fut.exception())] * len(chunk)
+    else:
+        results = fut.result()
+    for pending, (ok, value) in zip(chunk, results):
+        pending.loop.call_soon_threadsafe(_set_result, pending, ok, value)
+
+
+def _cancel_chunk(chunk: List[_PendingCall], fut: Future, _: "asyncio.Future[Any]") -> None:
+    # a chunk that has not started yet is dropped once nobody waits for any of its calls
+    if all(pending.future.cancelled() for pending in chunk):
+        fut.cancel()
+
+
+def _submit_batch(pending_calls: List[_PendingCall]) -> None:
+    """把一批调用按chunksize分组提交到进程池,减少每个任务的pickle和管道开销"""
+    calls: List[_PendingCall] = []
+    for pending in pending_calls:
+        if pending.future.cancelled():
+            # timed out or cancelled before the window closed
+            release_segments(pending.segments)
+        else:
+            calls.append(pending)
+    if not calls:
+        return
+    chunksize = _chunksize(len(calls))
+    for i in range(0, len(calls), chunksize):
+        chunk = calls[i : i + chunksize]
+        try:
+            # inside the try, this runs in a loop callback and errors building the pool must reach the callers
+            fut = get_pool().submit(run_handlers_in_process, [pending.call for pending in chunk])
+        except Exception as e:  # pylint: disable=broad-except
+            for pending in chunk:
+                release_segments(pending.segments)
+                _set_result(pending, False, e)
+            continue
+        fut.add_done_callback(partial(_chunk_done, chunk))
+        for pending in chunk:
+            pending.future.add_done_callback(partial(_cancel_chunk, chunk, fut))
+
+
+def _flush_pending(loop: asyncio.AbstractEventLoop) -> None:
+    _submit_batch(_PENDING.pop(loop, []))
+
+
+def _fail_pending(loop: asyncio.AbstractEventLoop, error: Exception) -> None:
+    for pending in _PENDING.pop(loop, []):
+        release_segments(pending.segments)
+        if not loop.is_closed():
+            loop.call_soon_threadsafe(_set_result, pending, False, error)
+
+
+async def run_in_pool(ref: HandlerRef, run_data: RunData, logger_factory_info: Optional[Dict[str, Any]] = None) -> Any:
+    payload, segments = pack_run_data(run_data)
+    loop = asyncio.get_running_loop()
+    pending = _PendingCall((ref, payload, logger_factory_info), loop.create_future(), loop, segments)
+    calls = _PENDING.get(loop)
+    if calls is None:
+        # calls of loops that were closed before their flush fired are never run, drop them
+        for closed in [other for other in _PENDING if other.is_closed()]:
+            _fail_pending(closed, RuntimeError("event loop is closed"))
+        _PENDING[loop] = calls = []
+        loop.call_later(BATCH_WINDOW, _flush_pending, loop)
+    calls.append(pending)
+    return await pending.future
+
+
+def shutdown_pool(wait: bool = False) -> None:
+    global _POOL
+    # calls still in their batch window would rebuild the pool, fail them instead
+    for loop in list(_PENDING):
+        _fail_pending(loop, RuntimeError("process pool is shut down"))
+    if _POOL is not None:
+        _POOL.shutdown(wait=wait)
+        _POOL = None
@@ -1,8 +1,12 @@
-from dataclasses import asdict, dataclass, fields
-from typing import Any, Dict, Optional
+import sys
+from dataclasses import dataclass, fields
+from typing import Any, Dict, FrozenSet, Optional, Tuple
 
+# slotted dataclasses need python 3.10, older versions keep the __dict__ layout
+_DATACLASS_SLOTS: Dict[str, bool] = {"slots": True} if sys.version_info >= (3, 10) else {}
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
 class RunData:
     """
     调度器传入的所有参数，执行函数通过g来获取这些参数
@@ -35,9 +39,13 @@ class RunData:
 
     @classmethod
     def from_dict(cls, data: dict) -> "RunData":
-        class_fields = {f.name for f in fields(cls)}
-        return RunData(**{k: v for k, v in data.items() if k in class_fields})
+        return cls(**{k: data[k] for k in data.keys() & _FIELD_NAMES})
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert RunData to dictionary for serialization."""
-        return asdict(self)
+        # all fields are flat, no need for the recursive copy of asdict
+        return {name: getattr(self, name) for name in _FIELDS}
+
+
+_FIELDS: Tuple[str, ...] = tuple(f.name for f in fields(RunData))
+_FIELD_NAMES: FrozenSet[str] = frozenset(_FIELDS)
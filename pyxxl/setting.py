@@ -1,5 +1,6 @@
 import inspect
 import logging
+import multiprocessing
 import os
 from dataclasses import asdict, dataclass, field
 from typing import Any, Literal, Optional, get_origin
@@ -59,7 +60,16 @@ class ExecutorConfig:
     """
 
     max_workers: int = 30
-    """执行器线程池（执行同步任务时使用）. Default: 30"""
+    """执行器进程池（执行同步任务时使用）. Default: 30"""
+    process_start_method: Optional[Literal["fork", "forkserver", "spawn"]] = None
+    """
+    同步任务进程池的启动方式. Default: None,使用multiprocessing的平台默认方式
+
+    forkserver会先启动一个干净的模板进程,之后的worker都从它fork出来,只需要import一次pyxxl,
+    也避免了从有线程(事件循环、线程池)在运行的主进程直接fork可能导致的死锁.
+    注意spawn和forkserver的worker不会继承主进程的内存,会重新import启动脚本,handler必须定义在可以被import的模块里,
+    启动脚本中的`app.run_executor()`必须放在`if __name__ == "__main__"`下面,否则每个worker都会再启动一个执行器.
+    """
     task_timeout: int = 60 * 10
     """任务的默认超时时间,如果调度器传了以参数executorTimeout为准. Default: 60 * 10"""
     task_queue_length: int = 30
@@ -96,6 +106,7 @@ class ExecutorConfig:
         self._valid_xxl_admin_baseurl()
         self._valid_executor_app_name()
         self._valid_logger_target()
+        self._valid_process_start_method()
 
         if not self.executor_listen_host:
             self.executor_listen_host = get_network_ip()
@@ -147,6 +158,13 @@ class ExecutorConfig:
         if self.log_target == "redis" and not self.log_redis_uri:
             raise ValueError("log_target 'redis' config item 'log_redis_uri' is necessary.")
 
+    def _valid_process_start_method(self) -> None:
+        methods = multiprocessing.get_all_start_methods()
+        if self.process_start_method is not None and self.process_start_method not in methods:
+            raise ValueError(
+                "process_start_method %r is not supported, choose from %s." % (self.process_start_method, methods)
+            )
+
     @property
     def executor_baseurl(self) -> str:
         """暴露给xxl-admin的地址"""
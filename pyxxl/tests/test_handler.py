@@ -3,6 +3,7 @@ import time
 
 import pytest
 
+from pyxxl import executor, process_pool
 from pyxxl.ctx import g
 from pyxxl.executor import HandlerInfo
 
@@ -62,3 +63,22 @@ async def test_sync_timeout_error(event_loop):
     now_r_num = len(r)
     await asyncio.sleep(2)
     assert len(r) > now_r_num
+
+
+def pytest_handler_sync():
+    return "ok"
+
+
+@pytest.mark.asyncio
+async def test_sync_pool_ref_cached(monkeypatch: pytest.MonkeyPatch):
+    calls = []
+
+    def _handler_ref(handler):
+        calls.append(handler)
+        return process_pool.handler_ref(handler)
+
+    monkeypatch.setattr(executor, "handler_ref", _handler_ref)
+    handler = HandlerInfo(handler=pytest_handler_sync)
+    for _ in range(2):
+        assert await handler.start(5) == "ok"
+    assert calls == [pytest_handler_sync]
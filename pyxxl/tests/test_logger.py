@@ -1,3 +1,4 @@
+import logging
 import time
 from pathlib import Path
 from typing import TYPE_CHECKING, Callable
@@ -6,6 +7,13 @@ import aiofiles
 import pytest
 
 from pyxxl.logger import DiskLog, LogBase, RedisLog
+from pyxxl.logger.common import (
+    TASK_FORMAT,
+    TASK_FORMATTER,
+    TASKDATE_FORMAT,
+    PyxxlBufferedFileHandler,
+    PyxxlTaskFormatter,
+)
 from pyxxl.tests.utils import INSTALL_REDIS, REDIS_TEST_URI
 from pyxxl.types import LogRequest, LogResponse
 from pyxxl.utils import try_import
@@ -124,3 +132,36 @@ async def test_disk_expired():
         assert log_file.exists()
         await file_log.expired_once()
         assert log_file.exists() is False
+
+
+def test_buffered_file_handler(tmp_path: Path):
+    log_file = tmp_path / "buffered.log"
+    handler = PyxxlBufferedFileHandler(str(log_file), flush_interval=0.1)
+    handler.setFormatter(TASK_FORMATTER)
+    logger = logging.getLogger("pyxxl.pytest.buffered")
+    logger.propagate = False
+    logger.addHandler(handler)
+    try:
+        logger.warning("test buffered 1.")
+        assert log_file.read_text() == ""
+        time.sleep(0.3)
+        assert "test buffered 1." in log_file.read_text()
+
+        logger.warning("test buffered 2.")
+        handler.close()
+        assert "test buffered 2." in log_file.read_text()
+    finally:
+        logger.removeHandler(handler)
+
+
+def test_task_formatter():
+    formatter = logging.Formatter(TASK_FORMAT, datefmt=TASKDATE_FORMAT)
+    record = logging.makeLogRecord({"msg": "test formatter", "logId": 1})
+    for created in (record.created, record.created + 0.5, record.created + 1):
+        record.created, record.msecs = created, (created - int(created)) * 1000
+        assert TASK_FORMATTER.format(record) == formatter.format(record)
+
+    no_datefmt = PyxxlTaskFormatter("%(asctime)s")
+    first = logging.makeLogRecord({"created": 1000.1, "msecs": 100})
+    second = logging.makeLogRecord({"created": 1000.9, "msecs": 900})
+    assert no_datefmt.format(first) != no_datefmt.format(second)
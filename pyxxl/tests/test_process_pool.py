@@ -0,0 +1,368 @@
+import asyncio
+import functools
+import logging
+import multiprocessing
+import os
+import pickle
+import sys
+import tempfile
+import threading
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+
+import pytest
+
+from pyxxl import process_executor, process_pool
+from pyxxl.ctx import g
+from pyxxl.logger import DiskLog
+from pyxxl.process_executor import SHM_THRESHOLD
+from pyxxl.schema import RunData
+from pyxxl.utils import try_import
+
+
+def pytest_pool_sync():
+    return g.xxl_run_data.logId, os.getpid()
+
+
+@pytest.mark.asyncio
+async def test_pool_reused():
+    ref = process_pool.handler_ref(pytest_pool_sync)
+    assert ref == "pyxxl.tests.test_process_pool:pytest_pool_sync"
+    pool = process_pool.get_pool()
+    results = [
+        await process_pool.run_in_pool(
+            ref,
+            RunData(jobId=1, logId=log_id, executorHandler="pytest_pool_sync", executorBlockStrategy="DISCARD_LATER"),
+        )
+        for log_id in range(2)
+    ]
+    assert process_pool.get_pool() is pool
+    assert [r[0] for r in results] == [0, 1]
+    assert os.getpid() not in [r[1] for r in results]
+
+
+class PytestPoolError(Exception):
+    def __init__(self, code: int, reason: str) -> None:
+        super().__init__(code, reason)
+
+
+def pytest_pool_custom_error():
+    raise PytestPoolError(1, "custom")
+
+
+@pytest.mark.asyncio
+async def test_pool_custom_error():
+    with pytest.raises(RuntimeError, match="pytest_pool_custom_error: PytestPoolError"):
+        await process_pool.run_in_pool(
+            process_pool.handler_ref(pytest_pool_custom_error),
+            RunData(jobId=1, logId=1, executorHandler="custom_error", executorBlockStrategy="DISCARD_LATER"),
+        )
+
+
+@pytest.mark.asyncio
+async def test_pool_unpicklable():
+    def _handler(): ...
+
+    assert process_pool.handler_ref(_handler) is None
+
+
+class PytestPoolService:
+    def __init__(self, value: int) -> None:
+        self.value = value
+
+    def run(self):
+        return self.value + g.xxl_run_data.logId
+
+
+def pytest_pool_add(a, b):
+    return a + b + g.xxl_run_data.logId
+
+
+@pytest.mark.asyncio
+async def test_pool_not_importable():
+    run = PytestPoolService(10).run
+    add = functools.partial(pytest_pool_add, 1, 2)
+    assert process_pool.handler_ref(run) is run
+    assert process_pool.handler_ref(add) is add
+    for handler, expected in ((run, 15), (add, 8)):
+        result = await process_pool.run_in_pool(
+            process_pool.handler_ref(handler),
+            RunData(jobId=1, logId=5, executorHandler="not_importable", executorBlockStrategy="DISCARD_LATER"),
+        )
+        assert result == expected
+
+
+def pytest_pool_batch():
+    if g.xxl_run_data.logId == 3:
+        raise ValueError("batch item failed")
+    return g.xxl_run_data.logId
+
+
+@pytest.mark.asyncio
+async def test_pool_batch():
+    ref = process_pool.handler_ref(pytest_pool_batch)
+    calls = [
+        process_pool.run_in_pool(
+            ref, RunData(jobId=1, logId=i, executorHandler="pytest_pool_batch", executorBlockStrategy="DISCARD_LATER")
+        )
+        for i in range(20)
+    ]
+    results = await asyncio.gather(*calls, return_exceptions=True)
+    assert isinstance(results[3], RuntimeError)
+    assert "ValueError('batch item failed')" in str(results[3])
+    assert 'raise ValueError("batch item failed")' in str(results[3].__cause__)
+    assert [r for i, r in enumerate(results) if i != 3] == [i for i in range(20) if i != 3]
+    assert process_pool._chunksize(1) == 1
+
+
+@pytest.mark.asyncio
+async def test_pool_broken_config():
+    process_pool.configure_pool(start_method="bogus")
+    try:
+        for _ in range(2):
+            with pytest.raises(ValueError):
+                await asyncio.wait_for(
+                    process_pool.run_in_pool(
+                        process_pool.handler_ref(pytest_pool_batch),
+                        RunData(jobId=1, logId=1, executorHandler="broken", executorBlockStrategy="DISCARD_LATER"),
+                    ),
+                    timeout=5,
+                )
+    finally:
+        process_pool.configure_pool()
+
+
+def test_pool_pending_across_loops():
+    ref = process_pool.handler_ref(pytest_pool_batch)
+
+    async def _call(log_id: int):
+        run_data = RunData(jobId=1, logId=log_id, executorHandler="loops", executorBlockStrategy="DISCARD_LATER")
+        return await asyncio.wait_for(process_pool.run_in_pool(ref, run_data), timeout=5)
+
+    async def _start_and_leave():
+        asyncio.ensure_future(_call(1))
+        await asyncio.sleep(0)
+
+    # the first loop is closed before its flush fires
+    asyncio.run(_start_and_leave())
+    assert asyncio.run(_call(2)) == 2
+    assert not process_pool._PENDING
+
+
+@pytest.mark.asyncio
+async def test_pool_shutdown_pending():
+    ref = process_pool.handler_ref(pytest_pool_batch)
+    call = asyncio.ensure_future(
+        process_pool.run_in_pool(
+            ref, RunData(jobId=1, logId=1, executorHandler="shutdown", executorBlockStrategy="DISCARD_LATER")
+        )
+    )
+    await asyncio.sleep(0)
+    process_pool.shutdown_pool()
+    with pytest.raises(RuntimeError, match="shut down"):
+        await call
+
+
+def pytest_pool_glue():
+    return g.xxl_run_data.glueSource
+
+
+@pytest.mark.asyncio
+async def test_pool_shared_memory():
+    glue_source = "x" * (SHM_THRESHOLD + 1)
+    result = await process_pool.run_in_pool(
+        process_pool.handler_ref(pytest_pool_glue),
+        RunData(
+            jobId=1,
+            logId=1,
+            executorHandler="pytest_pool_glue",
+            executorBlockStrategy="SERIAL_EXECUTION",
+            glueSource=glue_source,
+        ),
+    )
+    assert result == glue_source
+
+
+def pytest_pool_logging():
+    for i in range(100):
+        g.logger.info("pool log line %s", i)
+
+
+@pytest.mark.asyncio
+async def test_pool_task_logger():
+    with tempfile.TemporaryDirectory() as d:
+        disk_log = DiskLog(log_path=d)
+        await process_pool.run_in_pool(
+            process_pool.handler_ref(pytest_pool_logging),
+            RunData(jobId=1, logId=77, executorHandler="pytest_pool_logging", executorBlockStrategy="DISCARD_LATER"),
+            {"type": "DiskLog", "log_path": d},
+        )
+        with open(disk_log.key(77)) as f:
+            logs = f.read()
+        assert logs.count("pool log line") == 100
+        assert "[77] INFO" in logs
+
+
+@pytest.mark.asyncio
+async def test_pool_fork_after_task_logger(tmp_path: Path):
+    # the parent already runs a log listener when the fork pool is built
+    process_executor._create_process_logger(90030, {"type": "DiskLog", "log_path": str(tmp_path)})
+    process_pool.configure_pool(max_workers=1, start_method="fork")
+    try:
+        await asyncio.wait_for(
+            process_pool.run_in_pool(
+                process_pool.handler_ref(pytest_pool_logging),
+                RunData(jobId=1, logId=79, executorHandler="fork_logging", executorBlockStrategy="DISCARD_LATER"),
+                {"type": "DiskLog", "log_path": str(tmp_path)},
+            ),
+            timeout=10,
+        )
+    finally:
+        process_pool.configure_pool()
+    assert (tmp_path / "pyxxl-79.log").read_text().count("pool log line") == 100
+
+
+def test_release_logger_while_logging(tmp_path: Path):
+    logger = process_executor._create_process_logger(90031, {"type": "DiskLog", "log_path": str(tmp_path)})
+    stop = threading.Event()
+
+    def _keep_logging():
+        while not stop.is_set():
+            logger.info("left behind")
+
+    thread = threading.Thread(target=_keep_logging)
+    thread.start()
+    try:
+        logger.info("task line")
+        process_executor._release_process_logger(logger)
+    finally:
+        stop.set()
+        thread.join()
+    process_executor._release_process_logger(logger)
+    assert "task line" in (tmp_path / "pyxxl-90031.log").read_text()
+
+
+def test_pack_shared_memory_failed(monkeypatch: pytest.MonkeyPatch):
+    created = []
+
+    def _shared_memory(*args, **kwargs):
+        if created:
+            raise OSError("no space left on device")
+        created.append(SharedMemory(*args, **kwargs))
+        return created[-1]
+
+    monkeypatch.setattr(process_executor, "SharedMemory", _shared_memory)
+    big = "x" * (SHM_THRESHOLD + 1)
+    data = RunData(
+        jobId=1,
+        logId=1,
+        executorHandler="shm_failed",
+        executorBlockStrategy="SERIAL_EXECUTION",
+        executorParams=big,
+        glueSource=big,
+    )
+    with pytest.raises(OSError):
+        process_executor.pack_run_data(data)
+    with pytest.raises(FileNotFoundError):
+        SharedMemory(name=created[0].name)
+
+
+@pytest.mark.skipif(not try_import("msgpack"), reason="no msgpack package.")
+def test_pack_msgpack():
+    data = RunData(jobId=1, logId=1, executorHandler="test", executorBlockStrategy="SERIAL_EXECUTION")
+    payload, segments = process_executor.pack_run_data(data)
+    assert isinstance(payload, bytes) and not segments
+    assert process_executor.unpack_run_data(payload) == data
+
+
+def test_pack_without_msgpack(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(process_executor, "msgpack", None)
+    data = RunData(jobId=1, logId=1, executorHandler="test", executorBlockStrategy="SERIAL_EXECUTION")
+    payload, _ = process_executor.pack_run_data(data)
+    assert isinstance(payload, dict)
+    assert process_executor.unpack_run_data(payload) == data
+
+
+def test_run_data_slots():
+    data = RunData(jobId=1, logId=1, executorHandler="test", executorBlockStrategy="SERIAL_EXECUTION", glueSource="x")
+    assert pickle.loads(pickle.dumps(data)) == data
+    assert hash(data) == hash(RunData.from_dict(data.to_dict()))
+    if sys.version_info >= (3, 10):
+        assert not hasattr(data, "__dict__")
+
+
+def test_process_logger_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(process_executor, "LOGGER_CACHE_SIZE", 2)
+    info = {"type": "DiskLog", "log_path": str(tmp_path)}
+    logger = process_executor._create_process_logger(90001, info)
+    logger.info("first run")
+    process_executor._release_process_logger(logger)
+    assert process_executor._create_process_logger(90001, info) is logger
+    logger.info("second run")
+    process_executor._release_process_logger(logger)
+    assert (tmp_path / "pyxxl-90001.log").read_text().count("run") == 2
+
+    for log_id in (90002, 90003):
+        process_executor._create_process_logger(log_id, info)
+    assert 90001 not in process_executor._LOGGER_CACHE
+    assert not logger.handlers
+    assert str(tmp_path) in process_executor._MKDIR_CACHE
+
+
+def test_process_logger_path_changed(tmp_path: Path):
+    old_info, new_info = ({"type": "DiskLog", "log_path": str(tmp_path / d)} for d in ("old", "new"))
+    logger = process_executor._create_process_logger(90010, old_info)
+    old_handlers = process_executor._TASK_HANDLERS[logger.name]
+    logger.info("old path")
+    assert process_executor._create_process_logger(90010, new_info) is logger
+    # the handlers of the old path are closed, not just replaced
+    assert all(getattr(handler, "stream", None) is None for handler in old_handlers[1:])
+    assert "old path" in (tmp_path / "old" / "pyxxl-90010.log").read_text()
+    new_file = process_executor._TASK_HANDLERS[logger.name][1]
+    assert new_file.baseFilename == str(tmp_path / "new" / "pyxxl-90010.log")
+    process_executor._discard_process_logger(logger)
+
+
+def test_lazy_task_logger(tmp_path: Path):
+    info = {"type": "DiskLog", "log_path": str(tmp_path)}
+    lazy = process_executor.LazyTaskLogger(90020, info)
+    assert lazy.built is None and 90020 not in process_executor._LOGGER_CACHE
+    lazy.info("lazy line")
+    assert lazy.built is process_executor._LOGGER_CACHE[90020][1]
+    assert lazy.level == logging.INFO
+    assert isinstance(lazy, logging.Logger)
+    process_executor._release_process_logger(lazy.built)
+    assert "lazy line" in (tmp_path / "pyxxl-90020.log").read_text()
+
+    lazy = process_executor.LazyTaskLogger(90021, info)
+    lazy.disabled = True
+    assert lazy.built is not None and lazy.built.disabled
+    lazy.disabled = False
+
+
+def pytest_pool_no_logging():
+    return os.getpid()
+
+
+@pytest.mark.asyncio
+async def test_pool_no_logging():
+    with tempfile.TemporaryDirectory() as d:
+        await process_pool.run_in_pool(
+            process_pool.handler_ref(pytest_pool_no_logging),
+            RunData(jobId=1, logId=78, executorHandler="no_logging", executorBlockStrategy="DISCARD_LATER"),
+            {"type": "DiskLog", "log_path": d},
+        )
+        assert not os.listdir(d)
+
+
+def test_pool_start_method():
+    process_pool.configure_pool(max_workers=1, start_method="spawn")
+    try:
+        pool = process_pool.get_pool()
+        assert pool._mp_context.get_start_method() == "spawn"
+        assert pool._max_workers == 1
+    finally:
+        process_pool.configure_pool()
+    assert process_pool.get_pool() is not pool
+    default_method = multiprocessing.get_context().get_start_method()
+    assert process_pool.get_pool()._mp_context.get_start_method() == default_method
@@ -72,6 +72,15 @@ def test_config():
                 log_redis_uri="",
             ),
         ),
+        (
+            "process_start_method",
+            ValueError,
+            dict(
+                xxl_admin_baseurl=TEST_ADMIN_URL,
+                executor_app_name="test",
+                process_start_method="bogus",
+            ),
+        ),
     ],
 )
 def test_error(msg, error, kwargs):
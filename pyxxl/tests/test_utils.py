@@ -1,7 +1,9 @@
+import gc
 import uuid
 from pathlib import Path
 
-from pyxxl.utils import setup_logging, try_import
+from pyxxl import utils
+from pyxxl.utils import is_pickle_serializable, setup_logging, try_import
 
 
 def test_import():
@@ -19,3 +21,25 @@ def test_logging():
         data = f.readline()
         assert test_log_record in data
         assert "INFO" in data
+
+
+def test_pickle_serializable():
+    def _local(): ...
+
+    assert is_pickle_serializable(test_import)
+    assert is_pickle_serializable(_local) is False
+    assert is_pickle_serializable(lambda: 1) is False
+
+
+def test_pickle_serializable_cache():
+    class Picklable:
+        def __reduce__(self):
+            return (int, ())
+
+    obj = Picklable()
+    oid = id(obj)
+    assert is_pickle_serializable(obj)
+    assert oid in utils._PICKLE_OK_IDS
+    del obj
+    gc.collect()
+    assert oid not in utils._PICKLE_OK_IDS
@@ -1,9 +1,11 @@
 import importlib
 import logging
+import pickle
 import platform
 import socket
+import weakref
 from logging.handlers import RotatingFileHandler
-from typing import Any, List, Optional
+from typing import Any, List, Optional, Set
 
 DEFAULT_FORMAT = (
     "%(asctime)s.%(msecs)03d [%(threadName)s] %(levelname)s %(pathname)s(%(funcName)s:%(lineno)d) - %(message)s"
@@ -12,6 +14,8 @@ DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 STD_FORMATTER = logging.Formatter(DEFAULT_FORMAT, datefmt=DATE_FORMAT)
 DEFAULT_FILE_SIZE = 50 * 1024 * 1024
 DEFAULT_BACKUP_FILE_COUNT = 5
+# id of objects already known to be picklable, removed by a finalizer when the object is collected
+_PICKLE_OK_IDS: Set[int] = set()
 
 
 def get_network_ip() -> str:
@@ -59,3 +63,24 @@ def try_import(module: str) -> Optional[Any]:
     except ImportError:
         pass
     return None
+
+
+def is_pickle_serializable(obj: Any) -> bool:
+    """对象是否可以被pickle,不可pickle的同步handler无法在子进程中执行
+
+    成功的结果会按对象id缓存,同一个handler只会探测一次
+    """
+    oid = id(obj)
+    if oid in _PICKLE_OK_IDS:
+        return True
+    try:
+        pickle.dumps(obj, protocol=5)
+    except (pickle.PicklingError, TypeError, AttributeError, ValueError):
+        return False
+    try:
+        # the id may be reused once obj is gone, so only cache objects we can watch
+        weakref.finalize(obj, _PICKLE_OK_IDS.discard, oid)
+        _PICKLE_OK_IDS.add(oid)
+    except TypeError:
+        pass
+    return True